@@ -1,7 +1,33 @@
 import os
+import re
+import hashlib
 import PyPDF2
+from collections import Counter
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
+
+# Параметры поиска почти-дубликатов абзацев
+SHINGLE_SIZE = 5
+NEAR_DUPLICATE_THRESHOLD = 0.85
+# Строка считается колонтитулом, если повторяется хотя бы на такой доле страниц
+BOILERPLATE_PAGE_RATIO = 0.5
+BOILERPLATE_MIN_PAGES = 3
+# Дефис в конце строки PDF сохраняется только для известных составных слов,
+# во всех остальных случаях это перенос и слово склеивается
+HYPHEN_PRONOUNS = {
+    "что", "кто", "где", "как", "какой", "какая", "какое", "какие", "какого", "каким",
+    "когда", "куда", "откуда", "почему", "зачем", "чей", "чья", "чье", "чьё", "сколько",
+    "кого", "чего", "чему", "кем", "чем", "один", "одна", "одно",
+}
+HYPHEN_PARTICLES = {"то", "либо", "нибудь"}
+# Пары (левая часть, правая часть): "из-за", "всё-таки" и т.п.
+HYPHEN_PAIRS = {
+    ("из", "за"), ("из", "под"), ("всё", "таки"), ("все", "таки"), ("так", "таки"),
+    ("опять", "таки"), ("наконец", "таки"),
+}
+# "по-русски", "по-моему", "по-новому"; исключения - обычные слова с переносом после "по"
+HYPHEN_PO_ENDINGS = ("ски", "цки", "ому", "ему")
+HYPHEN_PO_EXCEPTIONS = {"этому", "тому", "чему", "кому", "всему"}
 
 def load_b1c_base() -> str:
     """
@@ -14,22 +40,36 @@ def load_b1c_base() -> str:
         raise FileNotFoundError(f"Папка {base_path} не найдена")
     
     combined_content = []
+    deduplicator = _ParagraphDeduplicator()
+    total_before = 0
+    total_after = 0
     
-    # Получаем список всех файлов в папке
-    files = list(base_path.glob("*"))
+    # Получаем список всех файлов в папке (сортируем, чтобы дедупликация была детерминированной)
+    files = sorted(base_path.glob("*"))
     
     for file_path in files:
         try:
             if file_path.suffix.lower() == '.pdf':
-                # Обрабатываем PDF файлы
-                content = _extract_pdf_text(file_path)
+                # Обрабатываем PDF файлы: размер считаем по тексту до удаления колонтитулов
+                raw_content, content = _extract_pdf_text(file_path)
+                content = _normalize_text(content, is_pdf=True)
             elif file_path.suffix.lower() == '.txt':
                 # Обрабатываем текстовые файлы
-                content = _extract_txt_text(file_path)
+                raw_content = _extract_txt_text(file_path)
+                content = _normalize_text(raw_content, is_pdf=False)
             else:
                 # Пропускаем неизвестные форматы
                 continue
                 
+            raw_size = len(raw_content.encode('utf-8'))
+            content = deduplicator.filter(file_path.name, content)
+            clean_size = len(content.encode('utf-8'))
+            total_before += raw_size
+            total_after += clean_size
+            _report_savings(file_path.name, raw_size, clean_size)
+            for original, count in deduplicator.attribution.get(file_path.name, {}).items():
+                print(f"  {count} абзац(ев) совпадают с {original}")
+            
             if content.strip():
                 combined_content.append(f"=== {file_path.name} ===\n{content}\n")
                 
@@ -37,20 +77,26 @@ def load_b1c_base() -> str:
             print(f"Ошибка при чтении файла {file_path}: {e}")
             continue
     
+    _report_savings("ИТОГО", total_before, total_after)
+    if deduplicator.removed:
+        print(f"Удалено дублирующихся абзацев: {deduplicator.removed}")
+    
     return "\n".join(combined_content)
 
-def _extract_pdf_text(pdf_path: Path) -> str:
-    """Извлекает текст из PDF файла"""
+def _extract_pdf_text(pdf_path: Path) -> Tuple[str, str]:
+    """
+    Извлекает текст из PDF файла.
+    Возвращает исходный текст PyPDF2 и текст без колонтитулов и номеров страниц.
+    """
     try:
         with open(pdf_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
+            pages = [page.extract_text() or "" for page in pdf_reader.pages]
+            raw_text = "\n".join(pages).strip()
+            return raw_text, "\n\n".join(_strip_page_boilerplate(pages)).strip()
     except Exception as e:
         print(f"Ошибка при чтении PDF {pdf_path}: {e}")
-        return ""
+        return "", ""
 
 def _extract_txt_text(txt_path: Path) -> str:
     """Извлекает текст из текстового файла"""
@@ -68,3 +114,192 @@ def _extract_txt_text(txt_path: Path) -> str:
     except Exception as e:
         print(f"Ошибка при чтении текстового файла {txt_path}: {e}")
         return ""
+
+
+def _strip_page_boilerplate(pages: List[str]) -> List[str]:
+    """
+    Удаляет колонтитулы и номера страниц.
+    Колонтитулом считается первая/последняя строка страницы, которая
+    (без учета цифр) повторяется на значительной части страниц.
+    """
+    if len(pages) < BOILERPLATE_MIN_PAGES:
+        return [_strip_page_number(page) for page in pages]
+    
+    edge_counts: Counter = Counter()
+    for page in pages:
+        lines = page.splitlines()
+        edges = {_boilerplate_key(lines[i].strip()) for i in _edge_line_indices(lines)}
+        edge_counts.update(edges)
+    
+    threshold = max(BOILERPLATE_MIN_PAGES, int(len(pages) * BOILERPLATE_PAGE_RATIO))
+    boilerplate = {key for key, count in edge_counts.items() if key and count >= threshold}
+    
+    cleaned = []
+    for page in pages:
+        lines = page.splitlines()
+        # Удаляем колонтитулы только в тех же крайних строках, где они искались,
+        # чтобы не задеть, например, числа в таблицах посреди страницы
+        removed = {
+            i for i in _edge_line_indices(lines)
+            if _boilerplate_key(lines[i].strip()) in boilerplate
+        }
+        kept = [line for i, line in enumerate(lines) if i not in removed]
+        cleaned.append(_strip_page_number("\n".join(kept)))
+    return cleaned
+
+def _edge_line_indices(lines: List[str]) -> Set[int]:
+    """Индексы первых и последних непустых строк страницы, где ищутся колонтитулы"""
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    # На коротких страницах смотрим только на крайние строки, чтобы не задеть основной текст
+    depth = 2 if len(non_empty) > 6 else 1
+    return set(non_empty[:depth] + non_empty[-depth:])
+
+def _boilerplate_key(line: str) -> str:
+    """Ключ строки для сравнения колонтитулов: номера страниц заменяются на #"""
+    return re.sub(r"\d+", "#", line.lower())
+
+def _strip_page_number(page: str) -> str:
+    """Убирает одиночный номер страницы в начале или в конце страницы"""
+    page = re.sub(r"^\s*(?:-\s*)?\d{1,4}(?:\s*-)?\s*\n", "", page)
+    page = re.sub(r"\n\s*(?:-\s*)?\d{1,4}(?:\s*-)?\s*$", "", page)
+    return page
+
+def _normalize_text(text: str, is_pdf: bool) -> str:
+    """
+    Очищает артефакты извлечения текста: повторяющиеся пробелы и пустые строки.
+    Для PDF дополнительно склеиваются переносы слов и разорванные строки внутри абзацев;
+    в TXT файлах структура строк сохраняется.
+    Абзацы разделяются одной пустой строкой.
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\u00ad", "")
+    text = text.replace("\u00a0", " ").replace("\t", " ")
+    if is_pdf:
+        # Склеиваем слова, разорванные переносом: "пси-\nхология" -> "психология"
+        text = re.sub(r"(\w+)-\n[ \t]*(\w+)", _join_hyphenated, text)
+    
+    paragraphs = []
+    for block in re.split(r"\n\s*\n", text):
+        lines = [re.sub(r" {2,}", " ", line).strip() for line in block.split("\n")]
+        lines = [line for line in lines if line]
+        if not lines:
+            continue
+        if not is_pdf:
+            paragraphs.append("\n".join(lines))
+            continue
+        paragraph = lines[0]
+        for line in lines[1:]:
+            # Строки списков и заголовков сохраняем на отдельной строке
+            if re.match(r"^(?:[-•*–—]|\d+[.)])\s", line) or (
+                paragraph.endswith((":", ".", "!", "?")) and line[:1].isupper()
+            ):
+                paragraph += "\n" + line
+            else:
+                paragraph += " " + line
+        paragraphs.append(paragraph)
+    return "\n\n".join(paragraphs)
+
+def _join_hyphenated(match: "re.Match") -> str:
+    """Склеивает перенос слова, сохраняя дефис в известных составных словах"""
+    left, right = match.group(1), match.group(2)
+    if _is_hyphenated_word(left.lower(), right.lower()):
+        return f"{left}-{right}"
+    return left + right
+
+def _is_hyphenated_word(left: str, right: str) -> bool:
+    """Проверяет, что left-right - составное слово с дефисом, а не перенос"""
+    if left == "кое" or (left, right) in HYPHEN_PAIRS:
+        return True
+    if left in HYPHEN_PRONOUNS and right in HYPHEN_PARTICLES:
+        return True
+    if left == "по" and len(right) >= 5 and right not in HYPHEN_PO_EXCEPTIONS:
+        return right.endswith(HYPHEN_PO_ENDINGS)
+    return False
+
+class _ParagraphDeduplicator:
+    """
+    Удаляет точные и почти-дубликаты абзацев между всеми файлами базы знаний.
+    Точные дубликаты находятся по хешу нормализованного текста, почти-дубликаты -
+    по коэффициенту Жаккара на множествах шинглов из SHINGLE_SIZE слов.
+    Первое вхождение абзаца остается в исходном файле.
+    Абзацы короче SHINGLE_SIZE слов (заголовки вроде "Пример:") не удаляются.
+    """
+    
+    def __init__(self):
+        self.exact_hashes: Dict[str, str] = {}
+        self.shingle_sets: List[Set[int]] = []
+        self.shingle_index: Dict[int, List[int]] = {}
+        self.sources: List[str] = []
+        # Для каждого файла: из каких файлов были взяты его удаленные абзацы
+        self.attribution: Dict[str, Counter] = {}
+        self.removed = 0
+    
+    def filter(self, source: str, text: str) -> str:
+        """Возвращает текст файла без абзацев, уже встречавшихся ранее"""
+        kept = []
+        for paragraph in text.split("\n\n"):
+            if not self._is_duplicate(source, paragraph):
+                kept.append(paragraph)
+        return "\n\n".join(kept)
+    
+    def _is_duplicate(self, source: str, paragraph: str) -> bool:
+        words = re.findall(r"\w+", paragraph.lower())
+        # Короткие абзацы - обычно повторяющиеся заголовки разделов, их оставляем
+        if len(words) < SHINGLE_SIZE:
+            return False
+        
+        digest = hashlib.sha1(" ".join(words).encode('utf-8')).hexdigest()
+        if digest in self.exact_hashes:
+            self._log_duplicate(source, self.exact_hashes[digest])
+            return True
+        
+        shingles = _shingles(words)
+        match = self._find_near_duplicate(shingles)
+        if match is not None:
+            self._log_duplicate(source, match)
+            return True
+
+        self.exact_hashes[digest] = source
+        paragraph_id = len(self.shingle_sets)
+        self.shingle_sets.append(shingles)
+        self.sources.append(source)
+        for shingle in shingles:
+            self.shingle_index.setdefault(shingle, []).append(paragraph_id)
+        return False
+    
+    def _find_near_duplicate(self, shingles: Set[int]) -> Optional[str]:
+        overlaps: Counter = Counter()
+        for shingle in shingles:
+            overlaps.update(self.shingle_index.get(shingle, ()))
+        for paragraph_id, common in overlaps.most_common():
+            other = self.shingle_sets[paragraph_id]
+            similarity = common / (len(shingles) + len(other) - common)
+            if similarity >= NEAR_DUPLICATE_THRESHOLD:
+                return self.sources[paragraph_id]
+            # most_common отсортирован по убыванию пересечения, дальше только хуже
+            if common < NEAR_DUPLICATE_THRESHOLD * len(shingles):
+                break
+        return None
+    
+    def _log_duplicate(self, source: str, original_source: str):
+        self.removed += 1
+        self.attribution.setdefault(source, Counter())[original_source] += 1
+
+def _shingles(words: List[str]) -> Set[int]:
+    """Множество хешей шинглов (последовательностей из SHINGLE_SIZE слов)"""
+    return {
+        hash(" ".join(words[i:i + SHINGLE_SIZE]))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+def _estimate_tokens(size_bytes: int) -> int:
+    """Грубая оценка количества токенов (~4 байта UTF-8 на токен)"""
+    return size_bytes // 4
+
+def _report_savings(name: str, raw_size: int, clean_size: int):
+    """Печатает экономию байтов и токенов после нормализации"""
+    saved = raw_size - clean_size
+    percent = (saved / raw_size * 100) if raw_size else 0.0
+    print(
+        f"{name}: {raw_size} -> {clean_size} байт, "
+        f"сэкономлено {saved} байт ({percent:.1f}%), ~{_estimate_tokens(saved)} токенов"
+    )
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк сборки тела запроса к DeepSeek API:
+сравнивает кодирование всего payload на каждый запрос (как json= в httpx),
+кодирование всего payload тем же компактным UTF-8 кодировщиком, что и клиент,
+и закэшированный префикс системного промпта.
+"""
+
+import gzip
+import json
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "bench")
+
+from deepseek_client import DeepSeekClient, _json_encoder
+
+ITERATIONS = 200
+KB_SIZES_KB = [10, 50, 100, 300]
+MESSAGES = [{"role": "user", "content": "Расскажи о принципах влияния на людей"}]
+
+def make_system_prompt(size_kb: int) -> str:
+    """Синтетический системный промпт заданного размера (в байтах UTF-8)"""
+    paragraph = "Психология влияния изучает, как люди меняют убеждения и поведение. "
+    repeats = size_kb * 1024 // len(paragraph.encode('utf-8')) + 1
+    return paragraph * repeats
+
+def make_payload(client: DeepSeekClient, system_prompt: str) -> dict:
+    """Новый payload целиком, как он собирался на каждый запрос"""
+    return {
+        "model": client.model,
+        "messages": [{"role": "system", "content": system_prompt}] + MESSAGES,
+        "stream": True,
+        "temperature": 0.7,
+        "max_tokens": 4000
+    }
+
+def encode_full(client: DeepSeekClient, system_prompt: str) -> bytes:
+    """Прежний способ: json.dumps (ensure_ascii=True) целиком на каждый запрос"""
+    return json.dumps(make_payload(client, system_prompt)).encode("utf-8")
+
+def encode_uncached(client: DeepSeekClient, system_prompt: str) -> bytes:
+    """Тот же компактный UTF-8 кодировщик без кэша: показывает выигрыш от кэширования отдельно"""
+    return _json_encoder.encode(make_payload(client, system_prompt)).encode("utf-8")
+
+def encode_cached(client: DeepSeekClient, system_prompt: str) -> bytes:
+    """Новый способ: закэшированный префикс + сообщения запроса"""
+    return client.build_request_body(MESSAGES, system_prompt, stream=True)
+
+def measure(encode, client: DeepSeekClient, system_prompt: str):
+    """Возвращает (мкс на запрос, пик выделенной памяти на запрос в байтах, размер тела)"""
+    body = encode(client, system_prompt)
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        encode(client, system_prompt)
+    elapsed_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    # Память считаем отдельно: tracemalloc заметно замедляет выполнение
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    encode(client, system_prompt)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed_us, peak - baseline, len(body)
+
+def check_body(client: DeepSeekClient, system_prompt: str):
+    """Проверяем, что собранное тело совпадает с исходным payload"""
+    body = client.build_request_body(MESSAGES, system_prompt, stream=True)
+    if client.gzip_requests:
+        body = gzip.decompress(body)
+    expected = json.loads(encode_full(client, system_prompt))
+    assert json.loads(body) == expected, "Тело запроса не совпадает с payload"
+
+def main():
+    print(f"🧪 Бенчмарк сборки тела запроса ({ITERATIONS} итераций)")
+    print(f"{'база':>8} {'режим':>10} {'мкс/запрос':>12} {'память/запрос':>14} {'тело, байт':>12}")
+
+    for gzip_requests in (False, True):
+        client = DeepSeekClient(gzip_requests=gzip_requests)
+        if gzip_requests:
+            modes = [("cached+gz", encode_cached)]
+        else:
+            modes = [("full", encode_full), ("uncached", encode_uncached), ("cached", encode_cached)]
+
+        for size_kb in KB_SIZES_KB:
+            system_prompt = make_system_prompt(size_kb)
+            check_body(client, system_prompt)
+            for name, encode in modes:
+                elapsed_us, peak, body_size = measure(encode, client, system_prompt)
+                print(f"{size_kb:>6}KB {name:>10} {elapsed_us:>12.1f} {peak:>14} {body_size:>12}")
+
+    print("✅ Бенчмарк завершен")
+
+if __name__ == "__main__":
+    main()
@@ -13,3 +13,6 @@ if not DEEPSEEK_API_KEY:
 # Настройки API
 DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
 DEEPSEEK_MODEL = "deepseek-chat"
+
+# Сжатие тела запроса gzip (включайте, только если API принимает Content-Encoding: gzip)
+DEEPSEEK_GZIP_REQUESTS = os.getenv("DEEPSEEK_GZIP_REQUESTS", "false").lower() in ("1", "true", "yes")
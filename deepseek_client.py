@@ -1,16 +1,89 @@
 import httpx
 import json
+import zlib
 import asyncio
-from typing import AsyncGenerator, Dict, Any, Optional
-from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL
+from typing import AsyncGenerator, Dict, Any, Optional, Tuple
+from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL, DEEPSEEK_GZIP_REQUESTS
+
+# Компактный JSON в UTF-8: кириллица не раздувается в \uXXXX
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
 
 class DeepSeekClient:
-    def __init__(self):
+    def __init__(self, gzip_requests: Optional[bool] = None):
+        """
+        Args:
+            gzip_requests: Сжимать тело запроса gzip (по умолчанию DEEPSEEK_GZIP_REQUESTS).
+                Задается только при создании клиента: от него зависят заголовки и кэш префикса.
+        """
         self.api_key = DEEPSEEK_API_KEY
         self.api_url = DEEPSEEK_API_URL
         self.model = DEEPSEEK_MODEL
         self.max_retries = 3
         self.retry_delay = 1.0
+        self._gzip_requests = DEEPSEEK_GZIP_REQUESTS if gzip_requests is None else gzip_requests
+        
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        if self._gzip_requests:
+            self.headers["Content-Encoding"] = "gzip"
+        
+        # Закодированный префикс запроса для последнего системного промпта:
+        # (системный промпт, режим gzip, байты префикса, состояние gzip после префикса)
+        self._prefix_cache: Optional[Tuple[str, bool, bytes, Any]] = None
+    
+    @property
+    def gzip_requests(self) -> bool:
+        """Сжимается ли тело запроса gzip"""
+        return self._gzip_requests
+    
+    def _get_prefix(self, system_prompt: str) -> Tuple[bytes, Any]:
+        """
+        Возвращает закодированную статическую часть тела запроса (модель и системное сообщение).
+        Кодируется один раз на версию системного промпта.
+        """
+        cached = self._prefix_cache
+        if cached is not None and cached[0] == system_prompt and cached[1] == self._gzip_requests:
+            return cached[2], cached[3]
+        
+        system_message = _json_encoder.encode({"role": "system", "content": system_prompt})
+        prefix = f'{{"model":{_json_encoder.encode(self.model)},"messages":[{system_message}'.encode('utf-8')
+        
+        compressor = None
+        if self._gzip_requests:
+            # Сжимаем префикс один раз; для каждого запроса продолжаем с копии состояния.
+            # Копия состояния zlib - около 300 КБ на запрос, что больше несжатого тела
+            # для небольшой базы знаний: gzip экономит трафик, но не память
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            prefix = compressor.compress(prefix)
+        
+        self._prefix_cache = (system_prompt, self._gzip_requests, prefix, compressor)
+        return prefix, compressor
+    
+    def build_request_body(
+        self,
+        messages: list,
+        system_prompt: str,
+        stream: bool = False,
+        temperature: float = 0.7,
+        max_tokens: int = 4000
+    ) -> bytes:
+        """Собирает тело запроса из закэшированного префикса и сообщений текущего запроса"""
+        prefix, compressor = self._get_prefix(system_prompt)
+        
+        suffix = "".join("," + _json_encoder.encode(message) for message in messages)
+        suffix += (
+            f'],"stream":{_json_encoder.encode(stream)},'
+            f'"temperature":{_json_encoder.encode(temperature)},'
+            f'"max_tokens":{_json_encoder.encode(max_tokens)}}}'
+        )
+        
+        if compressor is None:
+            return prefix + suffix.encode('utf-8')
+        
+        request_compressor = compressor.copy()
+        return prefix + request_compressor.compress(suffix.encode('utf-8')) + request_compressor.flush()
         
     async def chat_completion(
         self, 
@@ -31,27 +104,14 @@ class DeepSeekClient:
             max_tokens: Максимальное количество токенов в ответе
         """
         
-        # Формируем полный системный промпт
-        full_messages = [{"role": "system", "content": system_prompt}] + messages
-        
-        payload = {
-            "model": self.model,
-            "messages": full_messages,
-            "stream": stream,
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
-        
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        # Тело запроса: закэшированный префикс с системным промптом + сообщения
+        body = self.build_request_body(messages, system_prompt, stream, temperature, max_tokens)
         
         for attempt in range(self.max_retries):
             try:
                 async with httpx.AsyncClient(timeout=60.0) as client:
                     if stream:
-                        async with client.stream("POST", self.api_url, json=payload, headers=headers) as response:
+                        async with client.stream("POST", self.api_url, content=body, headers=self.headers) as response:
                             response.raise_for_status()
                             async for line in response.aiter_lines():
                                 if line.strip() and line.startswith("data: "):
@@ -67,7 +127,7 @@ class DeepSeekClient:
                                     except json.JSONDecodeError:
                                         continue
                     else:
-                        response = await client.post(self.api_url, json=payload, headers=headers)
+                        response = await client.post(self.api_url, content=body, headers=self.headers)
                         response.raise_for_status()
                         result = response.json()
                         
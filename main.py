@@ -11,6 +11,7 @@ from typing import Optional
 from base_loader import load_b1c_base
 from prompt_manager import PromptManager
 from deepseek_client import DeepSeekClient
+from stream_buffer import BufferedStream, StreamBuffer, StreamExpiredError
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -34,12 +35,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Frontend работает с другого домена и должен видеть ID стрима для переподключения
+    expose_headers=["X-Stream-ID"],
 )
 
 # Глобальные переменные для хранения загруженных данных
 prompt_manager: Optional[PromptManager] = None
 deepseek_client: Optional[DeepSeekClient] = None
 b1c_base_content: Optional[str] = None
+stream_buffer: Optional[StreamBuffer] = None
 
 class ChatRequest(BaseModel):
     message: str
@@ -52,7 +56,7 @@ class ChatResponse(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Загружаем все необходимые данные при запуске приложения"""
-    global prompt_manager, deepseek_client, b1c_base_content
+    global prompt_manager, deepseek_client, b1c_base_content, stream_buffer
     
     try:
         logger.info("Загружаем базу знаний B1C...")
@@ -65,6 +69,7 @@ async def startup_event():
         
         logger.info("Инициализируем DeepSeek клиент...")
         deepseek_client = DeepSeekClient()
+        stream_buffer = StreamBuffer()
         
         logger.info(f"Приложение успешно запущено на {HOST}:{PORT}!")
         
@@ -96,10 +101,12 @@ async def chat_endpoint(request: ChatRequest):
         system_prompt = prompt_manager.get_final_prompt()
         
         if request.stream:
-            # Стриминг ответ
+            # Стриминг ответ: буферизуем, чтобы клиент мог переподключиться по X-Stream-ID
+            stream = stream_buffer.start(stream_response(request.message, system_prompt))
             return StreamingResponse(
-                stream_response(request.message, system_prompt),
-                media_type="text/plain"
+                read_buffered_stream(stream, 0),
+                media_type="text/plain",
+                headers={"X-Stream-ID": stream.stream_id}
             )
         else:
             # Обычный ответ
@@ -123,6 +130,43 @@ async def stream_response(user_message: str, system_prompt: str):
         logger.error(f"Ошибка стриминга: {e}")
         yield f"Ошибка: {str(e)}"
 
+async def read_buffered_stream(stream: BufferedStream, offset: int):
+    """Отдает буферизованный стрим клиенту; если его часть уже удалена из буфера, сообщает об ошибке"""
+    try:
+        async for chunk in stream.read_from(offset):
+            yield chunk
+    except StreamExpiredError as e:
+        logger.error(f"Ошибка стриминга: {e}")
+        yield f"Ошибка: {str(e)}".encode('utf-8')
+
+@app.get("/chat/stream/{stream_id}")
+async def resume_stream(stream_id: str, offset: int = 0):
+    """
+    Продолжение прерванного стрима без нового запроса к API.
+    offset - количество уже полученных байт ответа (UTF-8).
+    """
+    if stream_buffer is None:
+        raise HTTPException(status_code=500, detail="Приложение не готово к работе")
+    
+    try:
+        stream = stream_buffer.get(stream_id)
+    except StreamExpiredError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    
+    if offset < 0 or offset > stream.end_offset:
+        raise HTTPException(status_code=400, detail=f"Некорректное смещение {offset} для стрима {stream_id}")
+    if offset < stream.start_offset:
+        raise HTTPException(
+            status_code=410,
+            detail=f"Данные стрима {stream_id} до смещения {stream.start_offset} уже удалены"
+        )
+    
+    return StreamingResponse(
+        read_buffered_stream(stream, offset),
+        media_type="text/plain",
+        headers={"X-Stream-ID": stream.stream_id}
+    )
+
 @app.get("/")
 async def root():
     """Корневой эндпоинт с информацией о приложении"""
@@ -131,6 +175,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "chat": "/chat",
+            "resume_stream": "/chat/stream/{stream_id}",
             "health": "/health"
         },
         "status": "running",
@@ -0,0 +1,173 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import AsyncGenerator, AsyncIterator, Deque, Set, Tuple
+
+# Ограничения буфера стримов по умолчанию
+STREAM_TTL_SECONDS = 300.0
+STREAM_MAX_TOTAL_BYTES = 32 * 1024 * 1024
+
+class StreamExpiredError(Exception):
+    """Запрошенная часть стрима уже удалена из буфера (или стрим не найден)"""
+
+class BufferedStream:
+    """
+    Ответ модели, буферизованный по мере получения чанков.
+    Смещение (offset) - количество байт ответа в UTF-8, уже полученных клиентом.
+    """
+
+    def __init__(self, stream_id: str):
+        self.stream_id = stream_id
+        # (смещение начала чанка, чанк в UTF-8)
+        self.chunks: Deque[Tuple[int, bytes]] = deque()
+        self.start_offset = 0
+        self.end_offset = 0
+        self.size_bytes = 0
+        self.done = False
+        self.updated_at = time.monotonic()
+        self._changed = asyncio.Condition()
+
+    async def append(self, chunk: str) -> int:
+        """Добавляет чанк, будит ожидающих читателей и возвращает его размер в байтах"""
+        data = chunk.encode('utf-8')
+        self.chunks.append((self.end_offset, data))
+        self.end_offset += len(data)
+        self.size_bytes += len(data)
+        self.updated_at = time.monotonic()
+        async with self._changed:
+            self._changed.notify_all()
+        return len(data)
+
+    async def finish(self):
+        """Помечает стрим завершенным"""
+        self.done = True
+        self.updated_at = time.monotonic()
+        async with self._changed:
+            self._changed.notify_all()
+
+    def drop_oldest_chunk(self) -> int:
+        """Удаляет самый старый чанк, возвращает освобожденный объем в байтах"""
+        start, chunk = self.chunks.popleft()
+        self.start_offset = start + len(chunk)
+        self.size_bytes -= len(chunk)
+        return len(chunk)
+
+    async def read_from(self, offset: int) -> AsyncGenerator[bytes, None]:
+        """
+        Отдает ответ в UTF-8 начиная с байта offset: сначала уже накопленные чанки,
+        затем новые по мере их поступления от API.
+        """
+        if offset < 0 or offset > self.end_offset:
+            raise ValueError(f"Некорректное смещение {offset} для стрима {self.stream_id}")
+
+        while True:
+            if offset < self.start_offset:
+                raise StreamExpiredError(f"Данные стрима {self.stream_id} до смещения {self.start_offset} уже удалены")
+
+            for start, chunk in list(self.chunks):
+                end = start + len(chunk)
+                if end <= offset:
+                    continue
+                yield chunk[offset - start:]
+                offset = end
+
+            if self.done and offset >= self.end_offset:
+                return
+
+            async with self._changed:
+                if offset >= self.end_offset and not self.done:
+                    await self._changed.wait()
+
+class StreamBuffer:
+    """
+    Ограниченное хранилище стримов в памяти.
+    Позволяет переподключившемуся клиенту получить пропущенные чанки и
+    продолжение ответа без нового запроса к API.
+    Стримы удаляются по TTL после последнего обновления. При превышении
+    общего лимита байт сначала удаляются завершенные стримы (самые старые первыми),
+    затем у еще генерируемых стримов отбрасываются самые старые чанки.
+    """
+
+    def __init__(self, ttl: float = STREAM_TTL_SECONDS, max_total_bytes: int = STREAM_MAX_TOTAL_BYTES):
+        self.ttl = ttl
+        self.max_total_bytes = max_total_bytes
+        self.streams: "OrderedDict[str, BufferedStream]" = OrderedDict()
+        self.total_bytes = 0
+        # Ссылки на фоновые задачи: цикл событий хранит только слабые ссылки
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self, source: AsyncIterator[str]) -> BufferedStream:
+        """
+        Создает новый стрим и запускает фоновую задачу, которая читает source
+        в буфер независимо от того, подключен ли клиент.
+        """
+        self._evict_expired()
+        stream = BufferedStream(uuid.uuid4().hex)
+        self.streams[stream.stream_id] = stream
+        task = asyncio.create_task(self._consume(stream, source))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return stream
+
+    def get(self, stream_id: str) -> BufferedStream:
+        """Возвращает стрим по ID"""
+        self._evict_expired()
+        stream = self.streams.get(stream_id)
+        if stream is None:
+            raise StreamExpiredError(f"Стрим {stream_id} не найден или устарел")
+        return stream
+
+    async def _consume(self, stream: BufferedStream, source: AsyncIterator[str]):
+        try:
+            async for chunk in source:
+                if stream.stream_id not in self.streams:
+                    # Стрим удален из буфера по TTL - закрываем запрос к API и сообщаем читателю
+                    await source.aclose()
+                    await self._append(stream, "Ошибка: стрим удален из буфера")
+                    break
+                await self._append(stream, chunk)
+                self._enforce_limit()
+        except Exception as e:
+            await self._append(stream, f"Ошибка: {str(e)}")
+        finally:
+            await stream.finish()
+
+    async def _append(self, stream: BufferedStream, chunk: str):
+        # Учитываем все байты стрима, пока он в буфере: _remove вычитает stream.size_bytes целиком
+        size = await stream.append(chunk)
+        if stream.stream_id in self.streams:
+            self.total_bytes += size
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for stream_id, stream in list(self.streams.items()):
+            if now - stream.updated_at > self.ttl:
+                self._remove(stream_id)
+
+    def _enforce_limit(self):
+        if self.total_bytes <= self.max_total_bytes:
+            return
+        by_age = sorted(self.streams.values(), key=lambda stream: stream.updated_at)
+
+        # Сначала удаляем завершенные стримы, начиная с давно обновленных
+        for stream in by_age:
+            if self.total_bytes <= self.max_total_bytes:
+                return
+            if stream.done:
+                self._remove(stream.stream_id)
+
+        # Генерируемые стримы не удаляем, а отбрасываем их самые старые чанки,
+        # оставляя последний, чтобы подключенный читатель мог продолжить
+        for stream in by_age:
+            if stream.done:
+                continue
+            while self.total_bytes > self.max_total_bytes and len(stream.chunks) > 1:
+                self.total_bytes -= stream.drop_oldest_chunk()
+            if self.total_bytes <= self.max_total_bytes:
+                return
+
+    def _remove(self, stream_id: str):
+        stream = self.streams.pop(stream_id, None)
+        if stream is not None:
+            self.total_bytes -= stream.size_bytes
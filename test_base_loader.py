@@ -0,0 +1,50 @@
+"""
+Тесты нормализации текста базы знаний
+"""
+
+import pytest
+
+from base_loader import _normalize_text, _strip_page_boilerplate, _ParagraphDeduplicator
+
+@pytest.mark.parametrize("raw, expected", [
+    # Обычные переносы склеиваются
+    ("по-\nлучить", "получить"),
+    ("по-\nмощь", "помощь"),
+    ("из-\nвестный", "известный"),
+    ("из-\nменение", "изменение"),
+    ("взаимодей-\nствие", "взаимодействие"),
+    ("информа-\nционный", "информационный"),
+    ("ле-\nто", "лето"),
+    ("пси-\nхология", "психология"),
+    ("по-\nтому", "потому"),
+    # Дефис в составных словах сохраняется
+    ("какой-\nто", "какой-то"),
+    ("кто-\nнибудь", "кто-нибудь"),
+    ("из-\nза", "из-за"),
+    ("кое-\nчто", "кое-что"),
+    ("всё-\nтаки", "всё-таки"),
+    ("по-\nрусски", "по-русски"),
+    ("по-\nмоему", "по-моему"),
+])
+def test_pdf_hyphenation(raw, expected):
+    assert _normalize_text(raw, is_pdf=True) == expected
+
+def test_hyphenation_does_not_cross_paragraphs():
+    assert _normalize_text("конец-\n\nНовый абзац", is_pdf=True) == "конец-\n\nНовый абзац"
+
+def test_txt_keeps_lines_and_hyphens():
+    text = "Глава 1\nВведение  в тему\n\n\nкакой-\nто"
+    assert _normalize_text(text, is_pdf=False) == "Глава 1\nВведение в тему\n\nкакой-\nто"
+
+def test_boilerplate_removed_only_at_page_edges():
+    pages = [f"Книга X\nтекст {i}\n2019\n150\nвывод {i}\n{i + 1}" for i in range(5)]
+    cleaned = _strip_page_boilerplate(pages)
+    assert cleaned[0] == "текст 0\n2019\n150\nвывод 0"
+
+def test_short_paragraphs_are_not_deduplicated():
+    deduplicator = _ParagraphDeduplicator()
+    body = "первый длинный абзац из шести слов"
+    text = f"Пример:\n\n{body}\n\nПример:\n\n{body}"
+    assert deduplicator.filter("a.txt", text) == f"Пример:\n\n{body}\n\nПример:"
+    assert deduplicator.filter("b.txt", body) == ""
+    assert deduplicator.attribution["b.txt"]["a.txt"] == 1
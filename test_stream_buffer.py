@@ -0,0 +1,86 @@
+"""
+Тесты буфера стримов: учет байт, TTL, вытеснение и продолжение по смещению
+"""
+
+import asyncio
+
+import pytest
+
+from stream_buffer import StreamBuffer, StreamExpiredError
+
+async def _source(chunks, delay=0.0, fail=None):
+    for chunk in chunks:
+        await asyncio.sleep(delay)
+        yield chunk
+    if fail:
+        raise RuntimeError(fail)
+
+async def _read_all(stream, offset=0):
+    return b"".join([chunk async for chunk in stream.read_from(offset)])
+
+def test_resume_by_utf8_byte_offset():
+    async def scenario():
+        buffer = StreamBuffer()
+        stream = buffer.start(_source(["Привет, ", "мир 👋", "!"]))
+        full = await _read_all(stream)
+        assert full.decode('utf-8') == "Привет, мир 👋!"
+        # Обрыв посреди многобайтового символа: клиент продолжает с полученного байта
+        received = full[:len("Привет, мир ".encode('utf-8')) + 2]
+        rest = await _read_all(buffer.get(stream.stream_id), len(received))
+        assert received + rest == full
+    asyncio.run(scenario())
+
+def test_invalid_offset():
+    async def scenario():
+        buffer = StreamBuffer()
+        stream = buffer.start(_source(["abc"]))
+        await _read_all(stream)
+        with pytest.raises(ValueError):
+            await _read_all(stream, 4)
+        with pytest.raises(ValueError):
+            await _read_all(stream, -1)
+    asyncio.run(scenario())
+
+def test_error_lines_are_accounted():
+    async def scenario():
+        buffer = StreamBuffer()
+        ok = buffer.start(_source(["hello"]))
+        failed = buffer.start(_source(["hi"], fail="boom"))
+        await _read_all(ok)
+        text = await _read_all(failed)
+        assert text.endswith("Ошибка: boom".encode('utf-8'))
+        assert buffer.total_bytes == ok.size_bytes + failed.size_bytes
+        buffer._remove(ok.stream_id)
+        buffer._remove(failed.stream_id)
+        assert buffer.total_bytes == 0
+    asyncio.run(scenario())
+
+def test_ttl_eviction():
+    async def scenario():
+        buffer = StreamBuffer(ttl=0.01)
+        stream = buffer.start(_source(["abc"]))
+        await _read_all(stream)
+        await asyncio.sleep(0.02)
+        with pytest.raises(StreamExpiredError):
+            buffer.get(stream.stream_id)
+        assert buffer.total_bytes == 0
+    asyncio.run(scenario())
+
+def test_limit_evicts_finished_streams_before_trimming_live_ones():
+    async def scenario():
+        buffer = StreamBuffer(max_total_bytes=20)
+        finished = buffer.start(_source(["0123456789"]))
+        await _read_all(finished)
+        live = buffer.start(_source(["abcde"] * 6, delay=0.001))
+        full = await _read_all(live)
+
+        # Завершенный стрим вытеснен целиком, генерируемый подключенный читатель получил весь ответ
+        assert full == b"abcde" * 6
+        with pytest.raises(StreamExpiredError):
+            buffer.get(finished.stream_id)
+        # У генерируемого стрима отброшены только старые чанки
+        assert live.start_offset > 0
+        assert buffer.total_bytes == live.size_bytes <= 20
+        with pytest.raises(StreamExpiredError):
+            await _read_all(live, 0)
+    asyncio.run(scenario())